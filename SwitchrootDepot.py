@@ -3,17 +3,28 @@ from ttkbootstrap.constants import *
 from tkinter import filedialog, messagebox, scrolledtext
 import requests
 import os
-import shutil
 import sys
 import platform
 import ctypes
 import struct
 import threading
+import queue
 import re
 import time
 import json
-from concurrent.futures import ThreadPoolExecutor
-from urllib.parse import urlparse # Import for URL logic
+import pickle
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from urllib.parse import urljoin # Import for URL logic
+
+# orjson is optional; it parses and writes the JSON files considerably faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # --- Resource & DPI Scaling (from NX_Wifi_Region_Changer) ---
 
@@ -39,16 +50,61 @@ def resource_path(relative_path):
 
 # --- Settings Management ---
 
+def json_loads(data):
+    """Decode JSON from str or bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps(obj):
+    """Encode JSON as indented text for human-edited files, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+    return json.dumps(obj, indent=4)
+
+def json_dumps_bytes(obj):
+    """Encode JSON as compact UTF-8 bytes for machine-read files like the scan cache.
+
+    orjson already produces bytes, so this skips the decode/encode round
+    trip that writing text would cost.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+def write_file_atomic(path, data):
+    """Write text or bytes to a temp file and swap it into place, so a failed write never truncates the original"""
+    tmp_path = path + ".tmp"
+    if isinstance(data, str):
+        # The JSON files are read back as UTF-8 bytes, whatever the locale's default encoding
+        data = data.encode('utf-8')
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
 SETTINGS_FILE = os.path.join(SCRIPT_DIR, "settings.json")
 LAST_SCAN_FILE = os.path.join(SCRIPT_DIR, "last_scan.json")
 COMPONENTS_FILE = os.path.join(SCRIPT_DIR, "components.json")
+GAPPS_CACHE_FILE = os.path.join(SCRIPT_DIR, "gapps_cache.json")
+GAPPS_CACHE_TTL = 3 * 3600  # Seconds before a cached GApps release is revalidated
+SCAN_CACHE_MAX_AGE = 6 * 3600  # Seconds before cached builds are refreshed in the background on startup
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
 
 def load_settings():
     """Load settings from JSON file"""
     if os.path.exists(SETTINGS_FILE):
         try:
-            with open(SETTINGS_FILE, 'r') as f:
-                return json.load(f)
+            with open(SETTINGS_FILE, 'rb') as f:
+                return json_loads(f.read())
         except Exception as e:
             print(f"Error loading settings: {e}")
     return {}
@@ -56,40 +112,123 @@ def load_settings():
 def save_settings(settings):
     """Save settings to JSON file"""
     try:
-        with open(SETTINGS_FILE, 'w') as f:
-            json.dump(settings, f, indent=4)
+        write_file_atomic(SETTINGS_FILE, json_dumps(settings))
     except Exception as e:
         print(f"Error saving settings: {e}")
 
+def positive_int(value, default):
+    """A setting as a positive int, or default when it is missing or invalid (e.g. 0 or "abc")"""
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return default
+    return number if number > 0 else default
+
+def pickle_sidecar_path(json_path):
+    """Path of the pickled copy kept next to a JSON file (e.g. last_scan.pkl)"""
+    return os.path.splitext(json_path)[0] + ".pkl"
+
+def json_source_stamp(json_path):
+    """Identifies one version of a JSON file by its exact mtime and size"""
+    st = os.stat(json_path)
+    return (st.st_mtime_ns, st.st_size)
+
+def load_pickle_sidecar(json_path):
+    """Load the pickled copy of a JSON file if it was made from exactly the JSON now on disk.
+
+    The stamp must match exactly rather than be newer: unzipping a release
+    over an old folder can leave a new JSON file with an older mtime.
+    """
+    pickle_path = pickle_sidecar_path(json_path)
+    try:
+        with open(pickle_path, 'rb') as f:
+            sidecar = pickle.load(f)
+        if (isinstance(sidecar, tuple) and len(sidecar) == 2
+                and sidecar[0] == json_source_stamp(json_path)):
+            return sidecar[1]
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error loading {os.path.basename(pickle_path)}, falling back to JSON: {e}")
+    return None
+
+def save_pickle_sidecar(json_path, data, source_stamp):
+    """Write a pickled copy of already-parsed JSON data for faster loading next time.
+
+    source_stamp is the json_source_stamp of the JSON the data came from,
+    taken before it was read so a concurrent edit is never masked.
+    """
+    try:
+        sidecar = (source_stamp, data)
+        write_file_atomic(pickle_sidecar_path(json_path), pickle.dumps(sidecar, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception as e:
+        print(f"Error saving {os.path.basename(pickle_sidecar_path(json_path))}: {e}")
+
+def read_last_scan_file():
+    """Read the raw scan cache, preferring its pickled copy over re-parsing the JSON"""
+    data = load_pickle_sidecar(LAST_SCAN_FILE)
+    if data is None:
+        source_stamp = json_source_stamp(LAST_SCAN_FILE)
+        with open(LAST_SCAN_FILE, 'rb') as f:
+            data = json_loads(f.read())
+        save_pickle_sidecar(LAST_SCAN_FILE, data, source_stamp)
+    return data
+
 def load_last_scan():
     """Load last scan cache from JSON file"""
     if os.path.exists(LAST_SCAN_FILE):
         try:
-            with open(LAST_SCAN_FILE, 'r') as f:
-                data = json.load(f)
-                # Check if cache is valid (less than 24 hours old)
-                scan_time = data.get('scan_timestamp', 0)
-                age = time.time() - scan_time
-                if age < 86400:  # 24 hours
-                    return data
-                else:
-                    print(f"Cache is {age/3600:.1f} hours old, will refresh.")
+            data = read_last_scan_file()
+            # Check if cache is valid (less than 24 hours old)
+            scan_time = data.get('scan_timestamp', 0)
+            age = time.time() - scan_time
+            if age < 86400:  # 24 hours
+                return data
+            else:
+                print(f"Cache is {age/3600:.1f} hours old, will refresh.")
         except Exception as e:
             print(f"Error loading last scan cache: {e}")
     return None
 
-def save_last_scan(builds, timestamp):
+def load_scan_validators():
+    """Load the per-URL ETag/Last-Modified validators from the scan cache, ignoring its age"""
+    if os.path.exists(LAST_SCAN_FILE):
+        try:
+            return read_last_scan_file().get('validators', {})
+        except Exception as e:
+            print(f"Error loading scan validators: {e}")
+    return {}
+
+def save_last_scan(builds, timestamp, validators=None):
     """Save scan results to cache file"""
     try:
         data = {
             'scan_timestamp': timestamp,
-            'builds': builds
+            'builds': builds,
+            'validators': validators or {}
         }
-        with open(LAST_SCAN_FILE, 'w') as f:
-            json.dump(data, f, indent=4)
+        write_file_atomic(LAST_SCAN_FILE, json_dumps_bytes(data))
+        save_pickle_sidecar(LAST_SCAN_FILE, data, json_source_stamp(LAST_SCAN_FILE))
     except Exception as e:
         print(f"Error saving last scan cache: {e}")
 
+def load_gapps_cache():
+    """Load cached GApps release lookups from JSON file"""
+    if os.path.exists(GAPPS_CACHE_FILE):
+        try:
+            with open(GAPPS_CACHE_FILE, 'rb') as f:
+                return json_loads(f.read())
+        except Exception as e:
+            print(f"Error loading GApps cache: {e}")
+    return {}
+
+def save_gapps_cache(cache):
+    """Save GApps release lookups to cache file"""
+    try:
+        write_file_atomic(GAPPS_CACHE_FILE, json_dumps_bytes(cache))
+    except Exception as e:
+        print(f"Error saving GApps cache: {e}")
+
 def load_components():
     """Load component definitions from JSON file"""
     if not os.path.exists(COMPONENTS_FILE):
@@ -99,8 +238,12 @@ def load_components():
         )
 
     try:
-        with open(COMPONENTS_FILE, 'r', encoding='utf-8') as f:
-            components = json.load(f)
+        components = load_pickle_sidecar(COMPONENTS_FILE)
+        if components is None:
+            source_stamp = json_source_stamp(COMPONENTS_FILE)
+            with open(COMPONENTS_FILE, 'rb') as f:
+                components = json_loads(f.read())
+            save_pickle_sidecar(COMPONENTS_FILE, components, source_stamp)
 
         # Validate required keys
         required_keys = [
@@ -118,10 +261,186 @@ def load_components():
     except Exception as e:
         raise Exception(f"Error loading components.json: {e}")
 
+# Translation table that deletes dashes, e.g. "2024-01-15" -> "20240115"
+STRIP_DASHES = str.maketrans('', '', '-')
+
+# MindTheGapps repo names, e.g. "14.0.0-arm64-ATV" -> ("14", "arm64-ATV")
+GAPPS_REPO_PATTERN = re.compile(r'(\d+)\.\d+\.\d+-(.+)')
+
+# --- Directory Listing Parsing ---
+
+@lru_cache(maxsize=None)
+def compile_pattern(pattern):
+    """Compile a regex from components.json once per process"""
+    return re.compile(pattern)
+
+CHARSET_PATTERN = re.compile(r'charset=["\']?([\w.:-]+)', re.IGNORECASE)
+
+def decode_listing(response):
+    """Decode a listing with the charset its Content-Type declares, or UTF-8 if none"""
+    match = CHARSET_PATTERN.search(response.headers.get('Content-Type', ''))
+    try:
+        return response.content.decode(match.group(1) if match else 'utf-8', errors='replace')
+    except LookupError:
+        # Unknown charset name
+        return response.content.decode('utf-8', errors='replace')
+
+LISTING_ROW_END_PATTERN = re.compile(r'\n|<a\s|</tr>', re.IGNORECASE)
+LISTING_TAG_PATTERN = re.compile(r'<[^>]+>')
+LISTING_DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}|\d{2}-[A-Za-z]{3}-\d{4}')
+LISTING_TIME_PATTERN = re.compile(r'\d{2}:\d{2}(?::\d{2})?')
+LISTING_SIZE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)([KMGT]?)B?', re.IGNORECASE)
+LISTING_SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+def parse_listing_size(body, pos):
+    """Parse the size column that follows a link in an Apache/Nginx autoindex row.
+
+    The row ends at the next newline, link or table row, and the size must
+    directly follow its date and time columns. Returns the size in bytes, or
+    None if the row doesn't end in one (e.g. "-" for directories or a
+    listing format we don't recognize), so the caller probes instead.
+    """
+    row_end = LISTING_ROW_END_PATTERN.search(body, pos)
+    row = body[pos:row_end.start() if row_end else len(body)]
+    # Drop markup and entity padding such as an empty "&nbsp;" description column
+    tokens = [token for token in LISTING_TAG_PATTERN.sub(' ', row).split() if not token.startswith('&')]
+    if len(tokens) < 3:
+        return None
+    if not (LISTING_DATE_PATTERN.fullmatch(tokens[-3]) and LISTING_TIME_PATTERN.fullmatch(tokens[-2])):
+        return None
+    match = LISTING_SIZE_PATTERN.fullmatch(tokens[-1])
+    if not match:
+        return None
+    number, unit = match.groups()
+    return int(float(number) * LISTING_SIZE_UNITS[unit.upper()])
+
+PROBE_CACHE_TTL = 300  # Seconds a probed file size is reused across rescans
+
+@lru_cache(maxsize=4096)
+def probe_file_size(session, url, bucket):
+    """Return a remote file's size using a 1-byte range request.
+
+    Results are memoized per URL; `bucket` is the current time divided by
+    PROBE_CACHE_TTL, so cached sizes expire when the bucket rolls over.
+    Failures raise and are therefore never cached.
+    """
+    # Content-Range of a 1-byte range response carries the full size
+    response = session.get(url, headers={'Range': 'bytes=0-0'}, stream=True,
+                           timeout=5, allow_redirects=True)
+    try:
+        # An error page's Content-Length is not the file's size
+        response.raise_for_status()
+    except requests.HTTPError:
+        response.close()
+        raise
+    content_range = response.headers.get('Content-Range', '')
+    total = content_range.rpartition('/')[2]
+    if response.status_code == 206 and total.isdigit():
+        # Consume the single byte so the keep-alive connection goes
+        # back to the pool instead of being closed
+        response.content
+        return int(total)
+    # Server ignored the range, so Content-Length is the full size;
+    # close without reading the body
+    response.close()
+    return int(response.headers.get('Content-Length', 0))
+
+PROGRESS_REPORT_BYTES = 256 * 1024  # Bytes a segment writes between progress reports
+PAGE_CACHE_DROP_BYTES = 64 * 1024 * 1024  # Downloads at least this big are kept out of the page cache
+PAGE_CACHE_DROP_STEP = 16 * 1024 * 1024  # Bytes written between eviction hints
+
+def drop_page_cache(f, start, length):
+    """Hint the OS to evict an already-written range of an open file from the page cache.
+
+    Multi-GB zips aren't read again right away, so keeping them cached only
+    pushes out the user's working set. POSIX_FADV_DONTNEED starts writeback
+    of dirty pages without waiting for it and drops the clean ones, so
+    repeating the hint as a download progresses evicts almost everything
+    without ever blocking on the disk. No-op where posix_fadvise is
+    unavailable (Windows, macOS).
+    """
+    if length <= 0 or not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        f.flush()
+        os.posix_fadvise(f.fileno(), start, length, os.POSIX_FADV_DONTNEED)
+    except OSError:
+        pass
+
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+@lru_cache(maxsize=64)
+def format_size(size_bytes):
+    """Human-readable size; the unit comes straight from the bit length instead of a division loop.
+
+    Cached because progress updates repeat the same total (and, while a
+    download stalls, the same downloaded size) over and over.
+    """
+    if size_bytes <= 0:
+        return "0 B"
+    unit = min((size_bytes.bit_length() - 1) // 10, len(SIZE_UNITS) - 1)
+    return f"{size_bytes / (1 << (10 * unit)):.1f} {SIZE_UNITS[unit]}"
+
+def drain_queue(q):
+    """Remove and sum everything currently in a queue without blocking"""
+    total = 0
+    while True:
+        try:
+            total += q.get_nowait()
+        except queue.Empty:
+            return total
+
+# --- Download Tasks ---
+
+class AppClosing(Exception):
+    """The main window closed; background work stops instead of finishing"""
+
+class RangeNotSupported(requests.RequestException):
+    """The server answered a range request with the whole file"""
+
+class SizeMismatch(requests.RequestException):
+    """The file on the server isn't the size the download was set up for"""
+
+@dataclass
+class DownloadTask:
+    """A single file to download; total is filled in once every task is known"""
+    url: str
+    name: str
+    num: int
+    total: int = 0
+    dist_type: str = ""
+    device_type: str = ""
+    file_path: Optional[str] = None  # Destination relative to the Android-X folder, if fixed
+    expected_size: int = 0  # Exact size from the scan, if known; skips the HEAD request
+
+def task_destination(download_dir, task):
+    """Where a download task's file goes inside the download directory"""
+    if not task.device_type:
+        return os.path.join(download_dir, task.name)
+
+    # Android files are grouped into one Android-X folder per device type
+    folder = os.path.join(download_dir, f"Android-{task.device_type}")
+    if task.dist_type in ["Android", "GApps"]:
+        # The main zips go to the root of the Android-X folder
+        return os.path.join(folder, task.name)
+    if task.dist_type == "Android-Build":
+        if task.name in ['boot.img', 'recovery.img', 'nx-plat.dtimg']:
+            # Installation files go to switchroot/install/
+            return os.path.join(folder, "switchroot", "install", task.name)
+        # Runtime files (bl31.bin, bl33.bin, boot.scr) go to switchroot/android/
+        return os.path.join(folder, "switchroot", "android", task.name)
+    if task.dist_type == "Android-Extras":
+        if task.file_path:
+            # Use the specified path (e.g., "switchroot/android/bootlogo_android.bmp")
+            return os.path.join(folder, task.file_path)
+        return os.path.join(folder, "switchroot", "android", task.name)
+    return os.path.join(download_dir, task.name)
+
 # --- Main Application Class ---
 
 class SwitchrootDownloader:
     VERSION = "1.0.0"
+    TREE_COLUMNS = ("type", "distro", "file", "size")
 
     def __init__(self, master):
         self.master = master
@@ -137,7 +456,7 @@ class SwitchrootDownloader:
             self.ANDROID_INI_TEMPLATE = components['android_ini_template']
             self.ANDROID_API_URL = components['api_urls']['android_api']
             self.GAPPS_ORG_URL = components['api_urls']['gapps_org']
-            self.DOWNLOAD_FILE_PATTERN = re.compile(components['file_patterns']['download_file_pattern'])
+            self.DOWNLOAD_FILE_PATTERN = compile_pattern(components['file_patterns']['download_file_pattern'])
             self.VERSION_MAP = components['version_map']
         except Exception as e:
             messagebox.showerror(
@@ -150,26 +469,52 @@ class SwitchrootDownloader:
         # --- State Variables ---
         self.settings = load_settings()
         self.github_token = self.settings.get('github_token', '')
+        self.update_github_headers()
         self.download_chunk_size = self.settings.get('download_chunk_size', 8388608)  # Default 8MB (increased from 2MB)
-        self.download_connections = self.settings.get('download_connections', 8)  # Number of parallel connections per file
+        self.download_connections = positive_int(self.settings.get('download_connections'), 8)  # Number of parallel connections per file
+        # Files downloaded at once; SWITCHROOT_DL_WORKERS overrides the setting
+        default_workers = min(8, (os.cpu_count() or 2) * 2)
+        self.download_workers = positive_int(
+            os.environ.get('SWITCHROOT_DL_WORKERS'),
+            positive_int(self.settings.get('download_workers'), default_workers)
+        )
         self.download_dir = os.path.expanduser("~/Downloads")
         self.cancel_download = False
+        self.closing = threading.Event()  # Set by on_close; scan and download loops stop at their next check
         self.last_update_time = 0
         self.fetched_gapps = set() # To prevent duplicate GApps entries
+        self._pending_items = deque()  # Scanned items waiting to be inserted into the tree
+        self._log_queue = deque()  # Log lines waiting for the UI pump
+        self._progress_state = None  # Latest download progress waiting for the UI pump
+        self._pump_scheduled = False
+        self._pump_lock = threading.Lock()
+        self._row_values = {}  # Treeview item id -> displayed values, used for sorting
+        self._row_size_bytes = {}  # Treeview item id -> total size in bytes, used for sorting
+        self._row_meta = {}  # Treeview item id -> typed row data (sizes as ints, build files as a dict), kept out of the Tk tags
+        self._refresh_rows = None  # Row key -> item id of rows not yet seen again by the running scan
+        self.previous_validators = {}  # ETag/Last-Modified per URL from the last scan
+        self.gapps_cache = load_gapps_cache()  # Latest GApps release per API URL, persisted between runs
+        self.gapps_cache_lock = threading.Lock()
+        self.gapps_lookups = {}  # (android_version, gapps_suffix) -> Future of the GApps found this scan
+        self.gapps_lookups_lock = threading.Lock()
+        self.scan_validators = {}  # ETag/Last-Modified per URL collected during this scan
+        self.scanned_sources = set()  # Distro column values of the sources this scan fetched successfully
         self.gapps_repo_list = []  # Cache for the list of GApps repos
+        self._gapps_index = {}  # GApps repo names keyed by (major version, suffix)
         self.completed_downloads = 0  # Track completed downloads
         self.download_lock = threading.Lock()  # Thread-safe counter
         self.session = requests.Session()  # Reusable session for connection pooling
 
-        # Configure session for better reliability
+        # Configure session for better reliability, with a pool large enough
+        # for the concurrent scan fan-out and multi-connection downloads
         adapter = requests.adapters.HTTPAdapter(
             max_retries=requests.adapters.Retry(
                 total=3,
-                backoff_factor=1,
+                backoff_factor=0.3,
                 status_forcelist=[429, 500, 502, 503, 504]
             ),
-            pool_connections=10,
-            pool_maxsize=20
+            pool_connections=max(32, self.download_connections * 2),
+            pool_maxsize=max(32, self.download_workers * self.download_connections + 16)
         )
         self.session.mount('http://', adapter)
         self.session.mount('https://', adapter)
@@ -182,7 +527,21 @@ class SwitchrootDownloader:
             'Connection': 'keep-alive'
         })
 
+        self._settings_after_id = None  # Pending debounced settings write
+
+        # Shared pool for scan and metadata I/O, with a semaphore so the
+        # fan-out never exceeds the configured number of connections
+        self.io_pool = ThreadPoolExecutor(max_workers=max(16, self.download_connections * 2),
+                                          thread_name_prefix='sdp-io')
+        self.io_slots = threading.Semaphore(self.download_connections)
+
+        # Bulk downloads get their own pool so long transfers never queue
+        # ahead of the small scan requests
+        self.download_pool = ThreadPoolExecutor(max_workers=self.download_workers,
+                                                thread_name_prefix='sdp-dl')
+
         self.create_widgets()
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
         self.log_message("Welcome to the Switchroot Depot!")
         self.log_message(f"Default download directory: {self.download_dir}")
         if self.github_token:
@@ -223,7 +582,7 @@ class SwitchrootDownloader:
         tree_frame = ttk.Frame(self.master, padding=10)
         tree_frame.pack(fill="both", expand=True, padx=10, pady=5)
 
-        cols = ("type", "distro", "file", "size")
+        cols = self.TREE_COLUMNS
         self.tree = ttk.Treeview(tree_frame, columns=cols, show="headings", selectmode="extended")
         
         self.tree.heading("type", text="Type", command=lambda: self.sort_tree("type", False))
@@ -271,17 +630,51 @@ class SwitchrootDownloader:
                                  bootstyle="secondary", width=12)
         clear_log_button.pack(side="right")
 
+        # Start the batched treeview inserter used by the scanners
+        self._flush_tree()
+
 
     # --- GUI & Logging Functions (from NX_Wifi_Region_Changer) ---
     
     def log_message(self, message):
-        """Add a message to the log widget"""
-        def _log():
+        """Add a message to the log widget (safe from any thread)"""
+        # deque.append is atomic; the UI pump inserts queued lines in one batch
+        self._log_queue.append(f"[{time.strftime('%H:%M:%S')}] {message}\n")
+        self._schedule_pump()
+
+    def post_progress(self, *progress):
+        """Record the latest progress for the UI pump; older unshown updates are dropped"""
+        with self._pump_lock:
+            self._progress_state = progress
+        self._schedule_pump()
+
+    def _schedule_pump(self):
+        """Schedules a single UI pump unless one is already pending"""
+        if self.closing.is_set():
+            return  # The window is gone; nothing left to update
+        with self._pump_lock:
+            if self._pump_scheduled:
+                return
+            self._pump_scheduled = True
+        self.master.after(50, self._pump_ui)
+
+    def _pump_ui(self):
+        """Applies queued log lines and the latest progress in one Tk callback"""
+        with self._pump_lock:
+            self._pump_scheduled = False
+            progress, self._progress_state = self._progress_state, None
+
+        lines = []
+        while self._log_queue:
+            lines.append(self._log_queue.popleft())
+        if lines:
             self.log_widget.config(state="normal")
-            self.log_widget.insert("end", f"[{time.strftime('%H:%M:%S')}] {message}\n")
+            self.log_widget.insert("end", "".join(lines))
             self.log_widget.see("end")
             self.log_widget.config(state="disabled")
-        self.master.after(0, _log)
+
+        if progress:
+            self.update_progress(*progress)
 
     def clear_log(self):
         """Clear the log widget"""
@@ -297,23 +690,26 @@ class SwitchrootDownloader:
 
     def center_window(self, window):
         """Center a popup window on the main window"""
-        # This function is now a wrapper to call the actual centering logic
-        # after a small delay, preventing the "flicker" effect.
-        window.after(10, lambda: self._do_center(window))
+        # Center once the window is mapped, when its size is known, instead of
+        # forcing idle layout passes on both windows to measure it
+        def on_map(event):
+            # Child widgets share the toplevel's bindings, so ignore their <Map> events
+            if event.widget is window:
+                window.unbind('<Map>', funcid)
+                self._do_center(window)
+
+        funcid = window.bind('<Map>', on_map, add=True)
 
     def _do_center(self, window):
         """Internal method to center a window relative to the parent"""
-        # Update both parent and child window to get accurate current positions
-        self.master.update_idletasks()
-        window.update_idletasks()
-
         parent_x = self.master.winfo_x()
         parent_y = self.master.winfo_y()
         parent_w = self.master.winfo_width()
         parent_h = self.master.winfo_height()
 
-        window_w = window.winfo_width()
-        window_h = window.winfo_height()
+        # Fall back to the requested size if the window manager hasn't sized it yet
+        window_w = window.winfo_width() if window.winfo_width() > 1 else window.winfo_reqwidth()
+        window_h = window.winfo_height() if window.winfo_height() > 1 else window.winfo_reqheight()
 
         x = parent_x + (parent_w // 2) - (window_w // 2)
         y = parent_y + (parent_h // 2) - (window_h // 2)
@@ -353,8 +749,9 @@ class SwitchrootDownloader:
         def save_token():
             new_token = token_entry.get().strip()
             self.github_token = new_token
+            self.update_github_headers()
             self.settings['github_token'] = new_token
-            save_settings(self.settings)
+            self.schedule_settings_save()
             self.log_message("GitHub PAT saved to settings.")
             settings_window.destroy()
 
@@ -462,7 +859,7 @@ class SwitchrootDownloader:
             self.download_connections = new_connections
             self.settings['download_chunk_size'] = new_chunk_size
             self.settings['download_connections'] = new_connections
-            save_settings(self.settings)
+            self.schedule_settings_save()
 
             new_mb = new_chunk_size / (1024 * 1024)
             messagebox.showinfo("Saved",
@@ -480,6 +877,28 @@ class SwitchrootDownloader:
 
         self.center_window(download_dialog)
 
+    def schedule_settings_save(self):
+        """Debounces settings writes so rapid changes cost a single disk write"""
+        if self._settings_after_id is None:
+            self._settings_after_id = self.master.after(250, self._flush_settings)
+
+    def _flush_settings(self):
+        """Writes any pending settings change to disk"""
+        if self._settings_after_id is not None:
+            self.master.after_cancel(self._settings_after_id)
+            self._settings_after_id = None
+            save_settings(self.settings)
+
+    def on_close(self):
+        """Flushes pending state before the main window closes"""
+        self._flush_settings()
+        # Pool workers aren't daemon threads and are joined at exit, so running
+        # scans and downloads have to notice the close and stop on their own
+        self.closing.set()
+        self.io_pool.shutdown(wait=False, cancel_futures=True)
+        self.download_pool.shutdown(wait=False, cancel_futures=True)
+        self.master.destroy()
+
     def set_ui_state(self, state):
         """Helper to enable/disable buttons"""
         self.scan_button.config(state=state)
@@ -487,24 +906,14 @@ class SwitchrootDownloader:
 
     def sort_tree(self, col, as_bytes):
         """Sorts the treeview column"""
-        items = [(self.tree.set(k, col), k) for k in self.tree.get_children("")]
-        
         if as_bytes:
-            # Custom sort for file sizes (e.g., "1.2 GB", "500 MB")
-            def sort_key(item):
-                size_str = item[0]
-                if "GB" in size_str:
-                    return float(size_str.replace(" GB", "")) * 1024 * 1024 * 1024
-                elif "MB" in size_str:
-                    return float(size_str.replace(" MB", "")) * 1024 * 1024
-                elif "KB" in size_str:
-                    return float(size_str.replace(" KB", "")) * 1024
-                else:
-                    return 0
-            items.sort(key=sort_key)
+            # Sort on the byte counts recorded at insert time, not the "1.2 GB" strings
+            items = [(self._row_size_bytes[k], k) for k in self.tree.get_children("")]
         else:
-            # Standard string sort
-            items.sort()
+            # Read the values from the Python-side row store rather than asking Tk per row
+            col_index = self.TREE_COLUMNS.index(col)
+            items = [(self._row_values[k][col_index], k) for k in self.tree.get_children("")]
+        items.sort()
 
         # Re-insert items in sorted order
         for index, (val, k) in enumerate(items):
@@ -522,77 +931,274 @@ class SwitchrootDownloader:
         self.progress_label.config(text="Scanning servers...")
         self.download_button.config(state="disabled")
 
-        # Clear existing items and caches
-        for i in self.tree.get_children():
-            self.tree.delete(i)
+        # Keep the current rows visible while the scan runs; it updates them
+        # in place and prunes whatever it doesn't find again
+        self._refresh_rows = {}
+        for item_id in self.tree.get_children():
+            key = self._row_key(self._row_values[item_id], self._row_meta[item_id])
+            self._refresh_rows[key] = item_id
         self.fetched_gapps.clear()
         self.gapps_repo_list.clear()
+        self._gapps_index.clear()
 
-        threading.Thread(target=self.scan_servers, daemon=True).start()
+        self.io_pool.submit(self.scan_servers)
 
     def scan_servers(self):
         """Main scanning logic"""
+        succeeded = False
         try:
+            self.previous_validators = load_scan_validators()
+            self.scan_validators = {}
+            self.scanned_sources = set()
+            self.gapps_lookups = {}
+
             self.fetch_gapps_repo_list() # *** NEW: Fetch GApps repos first ***
+            self.raise_if_closing()
+            self.prefetch_gapps_releases()
+            self.raise_if_closing()
             self.scan_linux_builds()
+            self.raise_if_closing()
             self.scan_android_builds()
+            self.raise_if_closing()
+            with self.gapps_cache_lock:
+                save_gapps_cache(self.gapps_cache)
 
-            # Save scan results to cache
-            self.save_scan_cache()
-
+            succeeded = True
             self.log_message("Server scan complete.")
             self.master.after(0, self.download_button.config, {"state": "normal"})
+        except AppClosing:
+            pass
         except Exception as e:
-            self.log_message(f"ERROR: Server scan failed: {e}")
-            messagebox.showerror("Error", f"Server scan failed:\n{e}")
+            if not self.closing.is_set():
+                self.log_message(f"ERROR: Server scan failed: {e}")
+                messagebox.showerror("Error", f"Server scan failed:\n{e}")
         finally:
-            self.master.after(0, self.set_ui_state, "normal")
-            self.master.after(0, self.progress_label.config, {"text": "Ready"})
+            # Prune and save once the queued rows are in the tree (unless the window is gone)
+            if not self.closing.is_set():
+                self.master.after(0, self._finish_scan_when_flushed, succeeded)
+                self.master.after(0, self.set_ui_state, "normal")
+                self.master.after(0, self.progress_label.config, {"text": "Ready"})
+
+    def raise_if_closing(self):
+        """Stops background work once the main window has closed"""
+        if self.closing.is_set():
+            raise AppClosing()
+
+    def conditional_headers(self, url):
+        """Returns If-None-Match/If-Modified-Since headers for a URL seen in the last scan"""
+        headers = {}
+        cached = self.previous_validators.get(url)
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        return headers
 
-    def get_github_headers(self):
-        """Returns GitHub API headers with PAT if available"""
+    def store_validators(self, url, response, **payload):
+        """Remembers a response's validators plus the data needed to answer a later 304"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            self.scan_validators[url] = {'etag': etag, 'last_modified': last_modified, **payload}
+
+    def update_github_headers(self):
+        """Rebuilds the cached GitHub API headers; call whenever the token changes"""
         headers = {'Accept': 'application/vnd.github.v3+json'}
         if self.github_token:
             headers['Authorization'] = f'token {self.github_token}'
-        return headers
+        self._gh_headers = headers
+
+    def get_github_headers(self):
+        """Returns GitHub API headers with PAT if available"""
+        return self._gh_headers
 
     # *** NEW ***
     def fetch_gapps_repo_list(self):
         """Fetches the list of all MindTheGapps repositories once per scan."""
         self.log_message("Fetching MindTheGapps repository list...")
         try:
-            session = requests.Session()
-            headers = self.get_github_headers()
-            response = session.get(self.GAPPS_ORG_URL, timeout=10, headers=headers)
+            url = self.GAPPS_ORG_URL
+            headers = {**self._gh_headers, **self.conditional_headers(url)}
+            response = self.session.get(url, timeout=10, headers=headers)
             response.raise_for_status()
-            repos = response.json()
-            self.gapps_repo_list = [repo['name'] for repo in repos]
+            cached = self.previous_validators.get(url)
+            if response.status_code == 304 and cached:
+                # Repo list unchanged since the last scan; GitHub doesn't count a 304 against the rate limit
+                self.gapps_repo_list = list(cached.get('repos', []))
+                self.scan_validators[url] = cached
+            else:
+                repos = json_loads(response.content)
+                self.gapps_repo_list = [repo['name'] for repo in repos]
+                self.store_validators(url, response, repos=self.gapps_repo_list)
+            self._build_gapps_index()
             self.log_message(f"Found {len(self.gapps_repo_list)} GApps repositories.")
         except Exception as e:
             self.log_message(f"Warning: Could not fetch GApps repository list. GApps will not be available. Error: {e}")
             self.gapps_repo_list = [] # Ensure it's a list
+            self._build_gapps_index()
+
+    def _build_gapps_index(self):
+        """Indexes the GApps repo names by (major version, suffix) for O(1) matching"""
+        self._gapps_index = {}
+        for name in self.gapps_repo_list:
+            match = GAPPS_REPO_PATTERN.match(name)
+            if not match:
+                continue
+            key = (match.group(1), match.group(2))
+            # Prefer the exact {version}.0.0-{suffix} repo, otherwise the first listed
+            if key not in self._gapps_index or name == f"{key[0]}.0.0-{key[1]}":
+                self._gapps_index[key] = name
+
+    def gapps_suffix_for(self, device_id):
+        """GApps repo suffix for a LineageOS device (tablet vs Android TV builds)"""
+        return "arm64" if device_id == "nx_tab" else "arm64-ATV"
+
+    def prefetch_gapps_releases(self):
+        """Fetches the latest release of every candidate GApps repo in one GraphQL request.
+
+        Results go into the GApps cache, so the per-build lookups are served
+        from it. GraphQL needs a token, so without a PAT (or for any repo the
+        query doesn't resolve) the lookups fall back to the REST API.
+        """
+        if not self.github_token:
+            return
+
+        suffixes = {self.gapps_suffix_for(device_id) for device_id in self.ANDROID_DEVICES}
+        now = time.time()
+        repos = []
+        with self.gapps_cache_lock:
+            for (version, suffix), repo_name in self._gapps_index.items():
+                cached = self.gapps_cache.get(self.gapps_release_url(repo_name))
+                if suffix in suffixes and not (cached and now - cached.get('fetched_at', 0) < GAPPS_CACHE_TTL):
+                    repos.append(repo_name)
+        if not repos:
+            return
+
+        fields = "\n".join(
+            f'r{i}: repository(owner: "MindTheGapps", name: {json.dumps(repo_name)}) '
+            '{ latestRelease { releaseAssets(first: 20) { nodes { name downloadUrl size } } } }'
+            for i, repo_name in enumerate(repos)
+        )
+        try:
+            self.log_message(f"Fetching latest releases of {len(repos)} GApps repositories...")
+            response = self.session.post(GITHUB_GRAPHQL_URL, timeout=10, headers=self._gh_headers,
+                                         json={'query': f"query {{\n{fields}\n}}"})
+            response.raise_for_status()
+            data = json_loads(response.content).get('data') or {}
+        except Exception as e:
+            self.log_message(f"Warning: Batched GApps lookup failed, falling back to per-repo requests. Error: {e}")
+            return
+
+        with self.gapps_cache_lock:
+            for i, repo_name in enumerate(repos):
+                release = (data.get(f"r{i}") or {}).get('latestRelease')
+                if not release:
+                    continue  # Left to the REST lookup
+                entry = {'name': None, 'url': None, 'size': 0}
+                for asset in release['releaseAssets']['nodes']:
+                    if asset['name'].endswith('.zip'):
+                        entry = {'name': asset['name'], 'url': asset['downloadUrl'], 'size': int(asset['size'])}
+                        break
+                entry.update(etag=None, last_modified=None, fetched_at=now)
+                self.gapps_cache[self.gapps_release_url(repo_name)] = entry
+
+    def gapps_release_url(self, repo_name):
+        """REST API URL of a GApps repo's latest release (also its GApps cache key)"""
+        return f"https://api.github.com/repos/MindTheGapps/{repo_name}/releases/latest"
+
+    def lookup_gapps(self, android_version, gapps_suffix, los_version):
+        """Finds the GApps release for an Android version, once per scan.
+
+        Lookups are shared between device threads: the first caller for a key
+        stores a Future and does the work, later callers wait on that Future
+        instead of issuing the same requests again.
+        """
+        gapps_key = (android_version, gapps_suffix)
+        with self.gapps_lookups_lock:
+            future = self.gapps_lookups.get(gapps_key)
+            owner = future is None
+            if owner:
+                future = self.gapps_lookups[gapps_key] = Future()
+
+        if not owner:
+            gapps = future.result()
+            if gapps['name']:
+                self.log_message(f"Using cached GApps: {gapps['name']}")
+            return gapps
+
+        gapps = {'name': None, 'url': None, 'size': 0}
+        try:
+            self.log_message(f"Searching for GApps: Android {android_version} ({gapps_suffix}) for LineageOS {los_version}")
+
+            repo_name = self.find_matching_gapps_repo(android_version, gapps_suffix)
+
+            if repo_name:
+                gapps_api_url = self.gapps_release_url(repo_name)
+                self.log_message(f"Found matching GApps repo: {repo_name}")
+
+                release = self.fetch_gapps_release(gapps_api_url)
+                gapps = {'name': release['name'], 'url': release['url'], 'size': release['size']}
+                if gapps['name']:
+                    self.log_message(f"Found compatible GApps: {gapps['name']}")
+        except Exception as e:
+            # The failure is cached too, so other builds don't retry it
+            self.log_message(f"Warning: Could not find GApps for Android {android_version} ({gapps_suffix}). Reason: {e}")
+        finally:
+            future.set_result(gapps)
+        return gapps
+
+    def fetch_gapps_release(self, api_url):
+        """Returns the .zip asset of a GApps repo's latest release.
+
+        Results are kept in the on-disk GApps cache: fresh entries are served
+        without a request, stale ones are revalidated with ETag/Last-Modified.
+        """
+        with self.gapps_cache_lock:
+            cached = self.gapps_cache.get(api_url)
+        if cached and time.time() - cached.get('fetched_at', 0) < GAPPS_CACHE_TTL:
+            return cached
+
+        headers = dict(self._gh_headers)
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        response = self.session.get(api_url, timeout=10, headers=headers)
+        response.raise_for_status()
+
+        if response.status_code == 304 and cached:
+            # Unchanged on GitHub (and not counted against the rate limit)
+            entry = dict(cached, fetched_at=time.time())
+        else:
+            entry = {'name': None, 'url': None, 'size': 0}
+            gapps_data = json_loads(response.content)
+            for asset in gapps_data.get('assets', []):
+                if asset['name'].endswith('.zip'):
+                    entry = {'name': asset['name'], 'url': asset['browser_download_url'], 'size': int(asset['size'])}
+                    break
+            entry.update(etag=response.headers.get('ETag'),
+                         last_modified=response.headers.get('Last-Modified'),
+                         fetched_at=time.time())
+
+        with self.gapps_cache_lock:
+            self.gapps_cache[api_url] = entry
+        return entry
 
-    # *** NEW ***
     def find_matching_gapps_repo(self, android_version, gapps_suffix):
         """Finds a repo name from the fetched list that matches the version and suffix.
 
         MindTheGapps repo naming pattern: {version}.0.0-{arch} or {version}.0.0-{arch}-{variant}
         Examples: 14.0.0-arm64, 14.0.0-arm64-ATV, 16.0.0-arm64-ATV
         """
-        # Try exact match first: {version}.0.0-{suffix}
-        exact_pattern = f"{android_version}.0.0-{gapps_suffix}"
-        for name in self.gapps_repo_list:
-            if name == exact_pattern:
-                self.log_message(f"Found exact GApps repo match: {name}")
-                return name
+        name = self._gapps_index.get((android_version, gapps_suffix))
+        if name:
+            self.log_message(f"Found GApps repo match: {name}")
+            return name
 
-        # Try pattern match: starts with {version}. and ends with -{suffix}
-        for name in self.gapps_repo_list:
-            if name.startswith(f"{android_version}.") and name.endswith(f"-{gapps_suffix}"):
-                self.log_message(f"Found pattern GApps repo match: {name}")
-                return name
-
-        # Log available repos for debugging
+        # Log available repos for debugging (only reached on a miss)
         matching_version = [n for n in self.gapps_repo_list if n.startswith(f"{android_version}.")]
         matching_suffix = [n for n in self.gapps_repo_list if n.endswith(f"-{gapps_suffix}")]
 
@@ -606,229 +1212,297 @@ class SwitchrootDownloader:
     def scan_linux_builds(self):
         """Scans Linux builds from various sources"""
         self.log_message("Scanning for Linux builds...")
-        session = requests.Session()
-        
-        for distro in self.LINUX_DISTROS:
-            name = distro["name"]
-            url = distro["url"]
-            
-            # Get the domain root (e.g., "https://download.switchroot.org")
-            parsed_url = urlparse(url)
-            domain_root = f"{parsed_url.scheme}://{parsed_url.netloc}"
-            
-            try:
-                self.log_message(f"Checking {name} at {url} ...")
-                response = session.get(url, timeout=10)
-                response.raise_for_status()
-                
-                files = self.DOWNLOAD_FILE_PATTERN.findall(response.text)
-                
-                if not files:
-                    self.log_message(f"No files found for {name} (pattern: .7z, .zip, .tar)")
-                    continue
 
-                for file in files:
-                    file_name = file.split('/')[-1]
-                    file_url = "" 
-                    
-                    # --- URL FIX LOGIC ---
-                    if file.startswith('http'):
-                        file_url = file
-                    elif file.startswith('/'):
-                        file_url = f"{domain_root}{file}"
-                    else:
-                        file_url = f"{url}{file}"
-                    # --- END OF FIX ---
-                    
-                    # Send HEAD request to get file size
-                    try:
-                        head_resp = session.head(file_url, timeout=5, allow_redirects=True)
-                        size_bytes = int(head_resp.headers.get('Content-Length', 0))
-                        size_str = self.format_size(size_bytes)
-                    except Exception as e:
-                        self.log_message(f"Warning: Could not get size for {file_name}. URL: {file_url}. Error: {e}")
-                        size_bytes = 0
-                        size_str = "0 B" 
-                    
-                    item_data = ("Linux", name, file_name, size_str, file_url, size_bytes)
-                    self.master.after(0, self.add_tree_item, item_data)
-                    
+        # Each distro listing is independent, so scrape them concurrently
+        futures = {self.io_pool.submit(self._scan_one_distro, distro): distro for distro in self.LINUX_DISTROS}
+        for future in as_completed(futures):
+            name = futures[future]["name"]
+            try:
+                for item_data in future.result():
+                    self._queue_tree_item(item_data)
+                self.scanned_sources.add(name)
             except Exception as e:
                 self.log_message(f"Warning: Failed to scan {name}: {e}")
 
+    def run_io_tasks(self, fn, args_list):
+        """Runs fn(*args) for each entry on the shared I/O pool and returns the results in order.
+
+        Tasks the pool hasn't started yet are run inline, so a pool worker
+        waiting here can never deadlock the pool.
+        """
+        futures = [self.io_pool.submit(fn, *args) for args in args_list]
+        results = []
+        for future, args in zip(futures, args_list):
+            if future.cancel():
+                # Also true for tasks cancelled by on_close, which must not run inline
+                self.raise_if_closing()
+                results.append(fn(*args))
+            else:
+                results.append(future.result())
+        return results
+
+    def _scan_one_distro(self, distro):
+        """Scrapes a single distro listing and returns its tree items"""
+        session = self.session
+        name = distro["name"]
+        url = distro["url"]
+
+        self.raise_if_closing()
+        self.log_message(f"Checking {name} at {url} ...")
+        response = session.get(url, timeout=10, headers=self.conditional_headers(url))
+        response.raise_for_status()
+
+        # Listing unchanged since the last scan: reuse its items without re-probing sizes
+        cached = self.previous_validators.get(url)
+        if response.status_code == 304 and cached:
+            self.log_message(f"{name} is unchanged since the last scan.")
+            self.scan_validators[url] = cached
+            return [tuple(item) for item in cached.get('items', [])]
+
+        # Autoindex pages are UTF-8 in practice, but requests assumes latin-1 for
+        # text/html without a charset, which mangles non-ASCII file names
+        body = decode_listing(response)
+        matches = list(self.DOWNLOAD_FILE_PATTERN.finditer(body))
+
+        if not matches:
+            self.log_message(f"No files found for {name} (pattern: .7z, .zip, .tar)")
+            return []
+
+        file_entries = []
+        for match in matches:
+            file = match.group(1)
+            file_name = file.rpartition('/')[2]
+            # Resolves absolute, root-relative and relative links against the listing URL
+            file_url = urljoin(url, file)
+
+            # Autoindex pages usually print the size next to the link
+            listed_size = parse_listing_size(body, match.end())
+            file_entries.append((file_name, file_url, listed_size))
+
+        def get_size(file_name, file_url):
+            self.raise_if_closing()
+            try:
+                with self.io_slots:
+                    return probe_file_size(session, file_url, int(time.time()) // PROBE_CACHE_TTL)
+            except Exception as e:
+                self.log_message(f"Warning: Could not get size for {file_name}. URL: {file_url}. Error: {e}")
+                return None
+
+        # Only probe the files whose size wasn't in the listing
+        unsized = [(file_name, file_url) for file_name, file_url, listed_size in file_entries if listed_size is None]
+        sizes = self.run_io_tasks(get_size, unsized)
+        probed_sizes = {file_url: size for (file_name, file_url), size in zip(unsized, sizes)}
+
+        items = []
+        for file_name, file_url, listed_size in file_entries:
+            size_bytes = listed_size if listed_size is not None else probed_sizes[file_url] or 0
+            size_str = self.format_size(size_bytes)
+            items.append(("Linux", name, file_name, size_str, file_url, size_bytes))
+
+        # A failed probe shows as 0 B for now; don't let a 304 replay it on later scans
+        if None not in sizes:
+            self.store_validators(url, response, items=items)
+        return items
+
     def scan_android_builds(self):
         """Scans ALL Android builds and compatible GApps, combining them into unified entries"""
         self.log_message("Scanning LineageOS API for Android...")
-        session = requests.Session()
+
+        # Device API calls are independent, so overlap them on the network
+        futures = {
+            self.io_pool.submit(self._scan_one_device, device_id, device_name): device_name
+            for device_id, device_name in self.ANDROID_DEVICES.items()
+        }
+        for future in as_completed(futures):
+            device_name = futures[future]
+            try:
+                for item_data in future.result():
+                    self._queue_tree_item(item_data)
+                self.scanned_sources.add(self.android_distro_name(device_name))
+            except Exception as e:
+                self.log_message(f"Warning: Failed to scan {device_name}: {e}")
+
+    def android_distro_name(self, device_name):
+        """Distro column value for a LineageOS device, e.g. 'Android TV' for 'Android (TV)'"""
+        return f"Android {device_name.partition('(')[2].rstrip(')') or device_name}"
+
+    def _scan_one_device(self, device_id, device_name):
+        """Scans a single LineageOS device and returns its unified tree items"""
+        session = self.session
 
         # Use version map from components.json
         version_map = self.VERSION_MAP
 
-        for device_id, device_name in self.ANDROID_DEVICES.items():
+        url = self.ANDROID_API_URL.format(device_id)
+        self.log_message(f"Checking {device_name} API: {url}")
+
+        # Retry logic with increased timeout (connect, read)
+        max_retries = 3
+        retry_delay = 2
+        for attempt in range(max_retries):
+            self.raise_if_closing()
             try:
-                url = self.ANDROID_API_URL.format(device_id)
-                self.log_message(f"Checking {device_name} API: {url}")
-
-                # Retry logic with increased timeout (connect, read)
-                max_retries = 3
-                retry_delay = 2
-                for attempt in range(max_retries):
-                    try:
-                        # Separate connect and read timeouts: (connect_timeout, read_timeout)
-                        response = session.get(url, timeout=(10, 60))
-                        response.raise_for_status()
-                        builds = response.json()
-                        break
-                    except requests.Timeout as e:
-                        if attempt < max_retries - 1:
-                            self.log_message(f"Timeout on attempt {attempt + 1}/{max_retries} ({e}), retrying in {retry_delay}s...")
-                            time.sleep(retry_delay)
-                            retry_delay *= 2  # Exponential backoff
-                        else:
-                            raise
-                    except requests.RequestException as e:
-                        if attempt < max_retries - 1:
-                            self.log_message(f"Network error on attempt {attempt + 1}/{max_retries}: {e}, retrying...")
-                            time.sleep(retry_delay)
-                            retry_delay *= 2
-                        else:
-                            raise
+                # Separate connect and read timeouts: (connect_timeout, read_timeout)
+                response = session.get(url, timeout=(10, 60), headers=self.conditional_headers(url))
+                response.raise_for_status()
+                cached = self.previous_validators.get(url)
+                if response.status_code == 304 and cached:
+                    # API response unchanged since the last scan, reuse its builds
+                    builds = cached.get('builds', [])
+                    self.scan_validators[url] = cached
+                else:
+                    builds = json_loads(response.content)
+                    self.store_validators(url, response, builds=builds)
+                break
+            except requests.Timeout as e:
+                if attempt < max_retries - 1:
+                    self.log_message(f"Timeout on attempt {attempt + 1}/{max_retries} ({e}), retrying in {retry_delay}s...")
+                    self.closing.wait(retry_delay)
+                    retry_delay *= 2  # Exponential backoff
+                else:
+                    raise
+            except requests.RequestException as e:
+                if attempt < max_retries - 1:
+                    self.log_message(f"Network error on attempt {attempt + 1}/{max_retries}: {e}, retrying...")
+                    self.closing.wait(retry_delay)
+                    retry_delay *= 2
+                else:
+                    raise
 
-                if not builds:
-                    self.log_message(f"No builds found for {device_name}.")
-                    continue
+        if not builds:
+            self.log_message(f"No builds found for {device_name}.")
+            return []
 
-                self.log_message(f"Found {len(builds)} builds for {device_name}.")
+        self.log_message(f"Found {len(builds)} builds for {device_name}.")
 
-                # Track which GApps we've fetched to avoid redundant API calls
-                fetched_gapps_versions = {}
+        items = []
 
-                for build in builds:
-                    los_version = build['version']
-                    build_date = build['date']
-
-                    # --- 1. Get LineageOS files ---
-                    build_files = {}
-                    lineage_zip_name = None
-                    lineage_zip_url = None
-                    lineage_zip_size = 0
-
-                    for file_info in build['files']:
-                        file_name = file_info['filename']
-                        file_url = file_info['url']
-                        size_bytes = int(file_info['size'])
-
-                        # Store all files in the dictionary
-                        build_files[file_name] = {'url': file_url, 'size': size_bytes}
-
-                        # Get the main LineageOS zip file
-                        if file_name.startswith('lineage-') and file_name.endswith('.zip'):
-                            lineage_zip_name = file_name
-                            lineage_zip_url = file_url
-                            lineage_zip_size = size_bytes
-
-                    if not lineage_zip_name:
-                        continue
+        # Clean device name: "Android (TV)" -> "TV", "Android (Tablet)" -> "Tablet"
+        device_type_clean = device_name.partition('(')[2].rstrip(')') or device_name
 
-                    # --- 2. Find compatible MindTheGapps ---
-                    android_version = version_map.get(los_version, los_version.split('.')[0])
-                    gapps_suffix = "arm64" if device_id == "nx_tab" else "arm64-ATV"
-                    gapps_key = (android_version, gapps_suffix)
-
-                    gapps_name = None
-                    gapps_url = None
-                    gapps_size = 0
-
-                    # Check cache first to avoid redundant API calls
-                    if gapps_key in fetched_gapps_versions:
-                        # Use cached GApps info
-                        cached = fetched_gapps_versions[gapps_key]
-                        gapps_name = cached.get('name')
-                        gapps_url = cached.get('url')
-                        gapps_size = cached.get('size', 0)
-                        if gapps_name:
-                            self.log_message(f"Using cached GApps: {gapps_name}")
-                    else:
-                        # Fetch GApps from API
-                        try:
-                            self.log_message(f"Searching for GApps: Android {android_version} ({gapps_suffix}) for LineageOS {los_version}")
-
-                            repo_name = self.find_matching_gapps_repo(android_version, gapps_suffix)
-
-                            if repo_name:
-                                gapps_api_url = f"https://api.github.com/repos/MindTheGapps/{repo_name}/releases/latest"
-                                self.log_message(f"Found matching GApps repo: {repo_name}")
-
-                                gapps_response = session.get(gapps_api_url, timeout=10, headers=self.get_github_headers())
-                                gapps_response.raise_for_status()
-
-                                gapps_data = gapps_response.json()
-                                for asset in gapps_data.get('assets', []):
-                                    if asset['name'].endswith('.zip'):
-                                        gapps_name = asset['name']
-                                        gapps_url = asset['browser_download_url']
-                                        gapps_size = int(asset['size'])
-                                        self.log_message(f"Found compatible GApps: {gapps_name}")
-                                        break
-
-                                # Cache the result
-                                fetched_gapps_versions[gapps_key] = {
-                                    'name': gapps_name,
-                                    'url': gapps_url,
-                                    'size': gapps_size
-                                }
-                        except Exception as e:
-                            self.log_message(f"Warning: Could not find GApps for Android {android_version} ({gapps_suffix}). Reason: {e}")
-                            # Cache the failure
-                            fetched_gapps_versions[gapps_key] = {
-                                'name': None,
-                                'url': None,
-                                'size': 0
-                            }
-
-                    # --- 3. Create unified entry ---
-                    # Clean device name: "Android (TV)" -> "TV", "Android (Tablet)" -> "Tablet"
-                    device_type_clean = device_name.split('(')[1].replace(')', '') if '(' in device_name else device_name
-
-                    # Distribution: "Android TV" or "Android Tablet"
-                    distro_display = f"Android {device_type_clean}"
-
-                    # Format date: "2024-01-15" -> "20240115"
-                    date_formatted = build_date.replace('-', '')
-
-                    # File name: "LineageOS 21.0 (20240115) + MindTheGapps" or "LineageOS 21.0 (20240115)" (if no GApps found)
-                    if gapps_name:
-                        file_display = f"LineageOS {los_version} ({date_formatted}) + MindTheGapps"
-                        combined_size = lineage_zip_size + gapps_size
-                    else:
-                        file_display = f"LineageOS {los_version} ({date_formatted}) (GApps not available)"
-                        combined_size = lineage_zip_size
-
-                    size_str = self.format_size(combined_size)
-
-                    # Store all necessary info in tags for download
-                    # Format: (lineage_url, lineage_size, gapps_url, gapps_size, device_type, build_files_json)
-                    build_files_json = json.dumps(build_files)
-                    device_type = device_type_clean
-
-                    item_data = (
-                        "Android",
-                        distro_display,
-                        file_display,
-                        size_str,
-                        lineage_zip_url,
-                        lineage_zip_size,
-                        build_files,
-                        gapps_url,
-                        gapps_size,
-                        device_type
-                    )
-
-                    self.master.after(0, self.add_tree_item, item_data)
-                    self.log_message(f"Added unified entry: {file_display} for {distro_display} ({build_date})")
+        # Distribution: "Android TV" or "Android Tablet"
+        distro_display = self.android_distro_name(device_name)
 
-            except Exception as e:
-                self.log_message(f"Warning: Failed to scan {device_name}: {e}")
+        for build in builds:
+            los_version = build['version']
+            build_date = build['date']
+
+            # --- 1. Get LineageOS files ---
+            build_files = {}
+            lineage_zip_name = None
+            lineage_zip_url = None
+            lineage_zip_size = 0
+
+            for file_info in build['files']:
+                file_name = file_info['filename']
+                file_url = file_info['url']
+                size_bytes = int(file_info['size'])
+
+                # Store all files in the dictionary
+                build_files[file_name] = {'url': file_url, 'size': size_bytes}
+
+                # Get the main LineageOS zip file
+                if file_name.startswith('lineage-') and file_name.endswith('.zip'):
+                    lineage_zip_name = file_name
+                    lineage_zip_url = file_url
+                    lineage_zip_size = size_bytes
+
+            if not lineage_zip_name:
+                continue
+
+            # --- 2. Find compatible MindTheGapps ---
+            android_version = version_map.get(los_version, los_version.split('.')[0])
+            gapps_suffix = self.gapps_suffix_for(device_id)
+
+            gapps = self.lookup_gapps(android_version, gapps_suffix, los_version)
+            gapps_name = gapps['name']
+            gapps_url = gapps['url']
+            gapps_size = gapps['size']
+
+            # --- 3. Create unified entry ---
+            # Format date: "2024-01-15" -> "20240115"
+            date_formatted = build_date.translate(STRIP_DASHES)
+
+            # File name: "LineageOS 21.0 (20240115) + MindTheGapps" or "LineageOS 21.0 (20240115)" (if no GApps found)
+            if gapps_name:
+                file_display = f"LineageOS {los_version} ({date_formatted}) + MindTheGapps"
+                combined_size = lineage_zip_size + gapps_size
+            else:
+                file_display = f"LineageOS {los_version} ({date_formatted}) (GApps not available)"
+                combined_size = lineage_zip_size
+
+            size_str = self.format_size(combined_size)
+
+            device_type = device_type_clean
+
+            item_data = (
+                "Android",
+                distro_display,
+                file_display,
+                size_str,
+                lineage_zip_url,
+                lineage_zip_size,
+                build_files,
+                gapps_url,
+                gapps_size,
+                device_type
+            )
+
+            items.append(item_data)
+            self.log_message(f"Added unified entry: {file_display} for {distro_display} ({build_date})")
+
+        return items
+
+    def _queue_tree_item(self, item_data):
+        """Queues a scanned item for the next batched treeview insert (any thread)"""
+        # deque.append is atomic, so scan threads need no extra locking here
+        self._pending_items.append(item_data)
+
+    def _flush_tree(self):
+        """Inserts queued items in batches instead of one Tk callback per item"""
+        try:
+            for _ in range(min(len(self._pending_items), 200)):
+                item_data = self._pending_items.popleft()
+                try:
+                    self.add_tree_item(item_data)
+                except Exception as e:
+                    self.log_message(f"Warning: Could not add {item_data[2] if len(item_data) > 2 else item_data} to the list: {e}")
+        finally:
+            # Always reschedule, or one bad item would stop rows from ever appearing again
+            self.master.after(50, self._flush_tree)
+
+    def _finish_scan_when_flushed(self, succeeded):
+        """Drops rows the scan didn't find again and saves the cache, once every queued item is in"""
+        if self._pending_items:
+            self.master.after(50, self._finish_scan_when_flushed, succeeded)
+            return
+
+        stale_rows, self._refresh_rows = self._refresh_rows, None
+        if not succeeded or not self.scanned_sources:
+            # Nothing was fetched (e.g. offline): keep the previous rows and cache as they are
+            return
+
+        # Only rows from sources the scan actually reached are known to be gone;
+        # rows from sources that failed stay. Rows from sources no longer in
+        # components.json are dropped too.
+        configured = {distro["name"] for distro in self.LINUX_DISTROS}
+        configured.update(self.android_distro_name(name) for name in self.ANDROID_DEVICES.values())
+        for item_id in stale_rows.values():
+            source = self._row_values[item_id][1]
+            if source in self.scanned_sources or source not in configured:
+                self._forget_row(item_id)
+        self.save_scan_cache()
+
+    def _row_key(self, values, tags):
+        """Identifies a row across scans by its type, distro and download URL"""
+        return (values[0], values[1], str(tags[0]) if tags else values[2])
+
+    def _forget_row(self, item_id):
+        """Removes a row from the tree and its side tables"""
+        self.tree.delete(item_id)
+        self._row_values.pop(item_id, None)
+        self._row_meta.pop(item_id, None)
+        self._row_size_bytes.pop(item_id, None)
 
     def add_tree_item(self, item_data):
         """Thread-safe method to add an item to the treeview"""
@@ -853,8 +1527,7 @@ class SwitchrootDownloader:
             if len(item_data) == 10 and isinstance(item_data[6], dict):
                 # New unified Android format (fresh from scan)
                 lineage_url, lineage_size, build_files, gapps_url, gapps_size, device_type = item_data[4:]
-                build_files_json = json.dumps(build_files) if build_files else ""
-                tags = (lineage_url, gapps_url, lineage_size, gapps_size, device_type, build_files_json)
+                tags = (lineage_url, gapps_url, lineage_size, gapps_size, device_type, build_files)
 
             # Fresh Linux data has 6 items: (type, distro, filename, size_str, url, size_bytes)
             elif len(item_data) == 6 and len(tags) == 2:
@@ -868,7 +1541,48 @@ class SwitchrootDownloader:
             # Fallback - shouldn't happen
             tags = ()
 
-        self.tree.insert("", "end", values=(dist_type, dist_name, file_name, size_str), tags=tags)
+        tags = self._typed_tags(tags)
+        values = (dist_type, dist_name, file_name, size_str)
+        item_id = None
+        if self._refresh_rows:
+            item_id = self._refresh_rows.pop(self._row_key(values, tags), None)
+        if item_id is not None:
+            # The row is still on the server: refresh it in place instead of re-inserting
+            self.tree.item(item_id, values=values)
+        else:
+            item_id = self.tree.insert("", "end", values=values)
+        self._row_values[item_id] = values
+        self._row_meta[item_id] = tags
+        self._row_size_bytes[item_id] = self._tags_size_bytes(tags)
+
+    def _typed_tags(self, tags):
+        """Row data with its sizes as ints, so download setup needs no conversions.
+
+        Older caches were written from Tk's tags and hold the sizes as strings.
+        """
+        def as_int(value):
+            try:
+                return int(value or 0)
+            except (TypeError, ValueError):
+                return 0
+
+        tags = list(tags)
+        if len(tags) >= 6:
+            # Unified Android: (lineage_url, gapps_url, lineage_size, gapps_size, device_type, build_files)
+            tags[2] = as_int(tags[2])
+            tags[3] = as_int(tags[3])
+        elif len(tags) >= 2:
+            # Linux: (file_url, size_bytes, device_type, build_files_json)
+            tags[1] = as_int(tags[1])
+        return tuple(tags)
+
+    def _tags_size_bytes(self, tags):
+        """Total byte size stored in a row's typed tags"""
+        if len(tags) >= 6:
+            return tags[2] + tags[3]
+        if len(tags) >= 2:
+            return tags[1]
+        return 0
 
     def load_cached_scan(self):
         """Load cached scan data on startup"""
@@ -893,8 +1607,17 @@ class SwitchrootDownloader:
 
                         # Reconstruct the item_data based on the number of tags
                         if len(tags) >= 6:
-                            # New unified Android format: (type, distro, filename, size_str, lineage_url, gapps_url, lineage_size, gapps_size, device_type, build_files_json)
-                            item_data = tuple(values) + tuple(tags)
+                            # Unified Android format: (lineage_url, gapps_url, lineage_size, gapps_size, device_type, build_files)
+                            # Rebuild it as a fresh scan item so build_files goes into the registry
+                            lineage_url, gapps_url, lineage_size, gapps_size, device_type, build_files = tags[:6]
+                            if isinstance(build_files, str):
+                                # Older caches stored build_files as a JSON string
+                                try:
+                                    build_files = json_loads(build_files) if build_files else {}
+                                except ValueError:
+                                    build_files = {}
+                            item_data = tuple(values) + (lineage_url, lineage_size, build_files,
+                                                         gapps_url, gapps_size, device_type)
                         else:
                             # Old format or Linux format
                             item_data = tuple(values) + tuple(tags)
@@ -902,7 +1625,12 @@ class SwitchrootDownloader:
                         self.add_tree_item(item_data)
 
                 self.download_button.config(state="normal")
-                self.log_message("Cached data loaded. Click 'Refresh Data' to fetch latest.")
+                if time.time() - scan_time > SCAN_CACHE_MAX_AGE:
+                    # Serve the stale rows now and revalidate them in the background
+                    self.log_message("Cached data is out of date, refreshing in the background...")
+                    self.start_scan_thread()
+                else:
+                    self.log_message("Cached data loaded. Click 'Refresh Data' to fetch latest.")
             else:
                 self.log_message("No cached builds found. Click 'Refresh Data' to scan servers.")
         else:
@@ -912,15 +1640,15 @@ class SwitchrootDownloader:
         """Save current tree items to cache"""
         builds = []
         for item_id in self.tree.get_children():
-            values = self.tree.item(item_id, "values")
-            tags = self.tree.item(item_id, "tags")
+            values = self._row_values[item_id]
+            tags = self._row_meta[item_id]
 
             # Combine values and tags into a single list
             build_data = list(values) + list(tags)
             builds.append(build_data)
 
         timestamp = time.time()
-        save_last_scan(builds, timestamp)
+        save_last_scan(builds, timestamp, self.scan_validators)
 
         from datetime import datetime
         scan_date = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
@@ -949,21 +1677,16 @@ class SwitchrootDownloader:
         task_num = 0
 
         for item_id in selected_items:
-            values = self.tree.item(item_id, "values")
-            tags = self.tree.item(item_id, "tags")
+            values = self._row_values[item_id]
+            tags = self._row_meta[item_id]
 
             dist_type = values[0]
             file_name = values[2]
 
             # Handle unified Android format (6 tags) vs old formats (2-4 tags)
             if dist_type == "Android" and len(tags) >= 6:
-                # New unified format: (lineage_url, gapps_url, lineage_size, gapps_size, device_type, build_files_json)
-                lineage_url = tags[0]
-                gapps_url = tags[1]
-                lineage_size = int(tags[2]) if isinstance(tags[2], str) else tags[2]
-                gapps_size = int(tags[3]) if isinstance(tags[3], str) else tags[3]
-                device_type = tags[4]
-                build_files_json = tags[5]
+                # New unified format: (lineage_url, gapps_url, lineage_size, gapps_size, device_type, build_files)
+                lineage_url, gapps_url, lineage_size, gapps_size, device_type, build_files = tags[:6]
 
                 # Check for 0-byte files
                 if lineage_size == 0:
@@ -972,27 +1695,24 @@ class SwitchrootDownloader:
 
                 android_device_types.add(device_type)
 
-                # Parse build files
-                if build_files_json:
-                    try:
-                        build_files = json.loads(build_files_json)
-                        android_build_files[device_type] = build_files
-                    except json.JSONDecodeError:
-                        pass
+                if build_files:
+                    android_build_files[device_type] = build_files
 
                 # Add LineageOS download task
                 task_num += 1
-                lineage_filename = [k for k in (build_files if build_files_json else {}) if k.startswith('lineage-') and k.endswith('.zip')]
+                lineage_filename = [k for k in build_files if k.startswith('lineage-') and k.endswith('.zip')]
                 lineage_filename = lineage_filename[0] if lineage_filename else "lineage.zip"
-                tasks.append((lineage_url, lineage_filename, task_num, 0, "Android", device_type))
+                tasks.append(DownloadTask(lineage_url, lineage_filename, task_num, dist_type="Android",
+                                          device_type=device_type, expected_size=lineage_size))
                 self.log_message(f"Adding LineageOS download: {lineage_filename}")
 
                 # Add GApps download task if available
                 if gapps_url and gapps_size > 0:
                     task_num += 1
                     # Extract GApps filename from URL
-                    gapps_filename = gapps_url.split('/')[-1]
-                    tasks.append((gapps_url, gapps_filename, task_num, 0, "GApps", device_type))
+                    gapps_filename = gapps_url.rpartition('/')[2]
+                    tasks.append(DownloadTask(gapps_url, gapps_filename, task_num, dist_type="GApps",
+                                              device_type=device_type, expected_size=gapps_size))
                     self.log_message(f"Adding GApps download: {gapps_filename}")
 
             else:
@@ -1014,13 +1734,13 @@ class SwitchrootDownloader:
                     # If this is a LineageOS build with associated files, store them
                     if dist_type == "Android" and build_files_json:
                         try:
-                            build_files = json.loads(build_files_json)
+                            build_files = json_loads(build_files_json)
                             android_build_files[device_type] = build_files
-                        except json.JSONDecodeError:
+                        except ValueError:
                             pass
 
                 task_num += 1
-                tasks.append((file_url, file_name, task_num, 0, dist_type, device_type))
+                tasks.append(DownloadTask(file_url, file_name, task_num, dist_type=dist_type, device_type=device_type))
 
         # Add required Android files for each device type
         for device_type in android_device_types:
@@ -1033,41 +1753,53 @@ class SwitchrootDownloader:
                         continue
 
                     task_num += 1
-                    tasks.append((
+                    tasks.append(DownloadTask(
                         file_info['url'],
                         file_name,
                         task_num,
-                        0,
-                        "Android-Build",
-                        device_type
+                        dist_type="Android-Build",
+                        device_type=device_type,
+                        expected_size=int(file_info.get('size', 0))
                     ))
                     self.log_message(f"Adding build file for Android {device_type}: {file_name}")
 
             # Add the static required files (bootloader files, icons, etc.)
             for req_file in self.ANDROID_REQUIRED_FILES:
                 task_num += 1
-                tasks.append((
+                tasks.append(DownloadTask(
                     req_file['url'],
                     req_file['name'],
                     task_num,
-                    0,
-                    "Android-Extras",
-                    device_type,
-                    req_file['path']  # Add path info
+                    dist_type="Android-Extras",
+                    device_type=device_type,
+                    file_path=req_file['path']  # Add path info
                 ))
                 self.log_message(f"Adding required file for Android {device_type}: {req_file['name']}")
 
+        # Several selected builds can share a file (e.g. the same GApps zip);
+        # download each URL to each destination only once
+        seen = set()
+        unique_tasks = []
+        for task in tasks:
+            key = (task.url, task_destination(self.download_dir, task))
+            if key not in seen:
+                seen.add(key)
+                unique_tasks.append(task)
+        if len(unique_tasks) < len(tasks):
+            self.log_message(f"Skipping {len(tasks) - len(unique_tasks)} duplicate download(s).")
+            tasks = unique_tasks
+
         if not tasks:
             self.log_message("No valid files to download.")
             self.reset_ui_after_download()
             return
 
         # Update all tasks with correct total count
-        total_tasks = len(tasks)
-        tasks = [(url, name, num, total_tasks) + tuple(rest) for url, name, num, _, *rest in tasks]
+        for task in tasks:
+            task.total = len(tasks)
 
         # Start the download pool
-        threading.Thread(target=self.download_files_pool, args=(tasks,), daemon=True).start()
+        self.io_pool.submit(self.download_files_pool, tasks)
 
     def download_files_pool(self, tasks):
         """Manages the ThreadPoolExecutor for downloads"""
@@ -1077,20 +1809,19 @@ class SwitchrootDownloader:
         # Track which Android device types we're downloading
         android_device_types = set()
         for task in tasks:
-            if len(task) >= 6:  # Has device_type
-                dist_type = task[4]
-                device_type = task[5]
-                if dist_type in ["Android", "Android-Build", "Android-Extras"] and device_type:
-                    android_device_types.add(device_type)
+            if task.dist_type in ["Android", "Android-Build", "Android-Extras"] and task.device_type:
+                android_device_types.add(task.device_type)
 
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            futures = [executor.submit(self.download_file_worker, *task) for task in tasks]
+        futures = [self.download_pool.submit(self.download_file_worker, task) for task in tasks]
 
-            for future in futures:
-                try:
-                    future.result() # Wait for each download to finish
-                except Exception as e:
-                    self.log_message(f"Error during download: {e}")
+        for future in futures:
+            try:
+                future.result() # Wait for each download to finish
+            except Exception as e:
+                self.log_message(f"Error during download: {e}")
+
+        if self.closing.is_set():
+            return
 
         # Create android.ini files for each Android device type
         for device_type in android_device_types:
@@ -1099,24 +1830,76 @@ class SwitchrootDownloader:
         self.log_message("All download tasks complete.")
         self.master.after(0, self.reset_ui_after_download)
 
-    def download_segment(self, url, start, end, segment_num, temp_file, progress_dict, filename):
-        """Download a single segment of a file"""
+    def read_size(self, expected_bytes):
+        """Chunk size for reading a response body of a known length.
+
+        Each read allocates a buffer of the full chunk size, so a small file or
+        segment shouldn't pay for a 16 MB buffer per read.
+        """
+        if expected_bytes > 0:
+            return min(self.download_chunk_size, expected_bytes)
+        return self.download_chunk_size
+
+    def download_segment(self, url, start, end, total_size, segment_num, filepath, progress_q, filename):
+        """Download a single segment of a file straight into its offset in the output file"""
         headers = {'Range': f'bytes={start}-{end}'}
         try:
-            response = self.session.get(url, headers=headers, stream=True, timeout=30, allow_redirects=True)
-            response.raise_for_status()
-
-            with open(temp_file, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=self.download_chunk_size):
-                    if chunk:
-                        f.write(chunk)
-                        progress_dict[segment_num] += len(chunk)
+            # Closing the response returns its connection to the shared pool even on errors
+            with self.session.get(url, headers=headers, stream=True, timeout=30, allow_redirects=True) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    # A full-body response would overwrite the other segments
+                    raise RangeNotSupported(f"Server ignored the range request (HTTP {response.status_code})")
+
+                # Content-Range is "bytes start-end/total"; the total comes from the
+                # scan rather than a HEAD, so make sure the file hasn't changed since
+                content_range = response.headers.get('Content-Range', '')
+                served_range, _, served_total = content_range.rpartition(' ')[2].partition('/')
+                if served_total not in (str(total_size), '*') or not served_range.startswith(f"{start}-"):
+                    raise SizeMismatch(f"Server returned Content-Range '{content_range}' for a "
+                                       f"{total_size}-byte file; refresh the list and try again")
+
+                # Each segment has its own handle on the preallocated file, so no shared state
+                unreported = 0
+                try:
+                    with open(filepath, 'r+b') as f:
+                        f.seek(start)
+                        # The file is preallocated, so its size is the whole download's
+                        evict_cache = os.fstat(f.fileno()).st_size >= PAGE_CACHE_DROP_BYTES
+                        written = 0
+                        next_evict = PAGE_CACHE_DROP_STEP
+                        for chunk in response.iter_content(chunk_size=self.read_size(end - start + 1)):
+                            self.raise_if_closing()
+                            if chunk:
+                                f.write(chunk)
+                                written += len(chunk)
+                                # Report progress in batches rather than once per chunk
+                                unreported += len(chunk)
+                                if unreported >= PROGRESS_REPORT_BYTES:
+                                    progress_q.put(unreported)
+                                    unreported = 0
+                                if evict_cache and written >= next_evict:
+                                    drop_page_cache(f, start, written)
+                                    next_evict += PAGE_CACHE_DROP_STEP
+                        if evict_cache:
+                            drop_page_cache(f, start, written)
+                finally:
+                    if unreported:
+                        progress_q.put(unreported)
+        except (RangeNotSupported, SizeMismatch, AppClosing):
+            raise  # Handled by download_file_worker
         except Exception as e:
             self.log_message(f"Error downloading segment {segment_num} of {filename}: {e}")
             raise
 
-    def download_file_worker(self, url, filename, file_num, total_files, dist_type="", device_type="", file_path=None):
+    def download_file_worker(self, task):
         """The actual file downloader with multi-connection support"""
+        url = task.url
+        filename = task.name
+        total_files = task.total
+        dist_type = task.dist_type
+        device_type = task.device_type
+
         # Get current completed count + 1 for "Starting" message
         with self.download_lock:
             current_starting = self.completed_downloads + 1
@@ -1124,53 +1907,27 @@ class SwitchrootDownloader:
         self.log_message(f"({current_starting}/{total_files}) Starting download: {filename}")
 
         # Determine download path based on type
+        filepath = task_destination(self.download_dir, task)
+        target_path = os.path.dirname(filepath)
+        os.makedirs(target_path, exist_ok=True)
         if dist_type in ["Android", "GApps"] and device_type:
-            # Create subfolder for Android files (main zip goes to root of Android-X folder)
-            folder_name = f"Android-{device_type}"
-            download_path = os.path.join(self.download_dir, folder_name)
-            os.makedirs(download_path, exist_ok=True)
-            filepath = os.path.join(download_path, filename)
-            self.log_message(f"Organizing into folder: {folder_name}")
-        elif dist_type == "Android-Build" and device_type:
-            # Build files go to specific locations based on their type
-            folder_name = f"Android-{device_type}"
-
-            # Determine subfolder based on file type
-            if filename in ['boot.img', 'recovery.img', 'nx-plat.dtimg']:
-                # Installation files go to switchroot/install/
-                target_path = os.path.join(self.download_dir, folder_name, "switchroot", "install")
-            else:
-                # Runtime files (bl31.bin, bl33.bin, boot.scr) go to switchroot/android/
-                target_path = os.path.join(self.download_dir, folder_name, "switchroot", "android")
-
-            os.makedirs(target_path, exist_ok=True)
-            filepath = os.path.join(target_path, filename)
+            self.log_message(f"Organizing into folder: Android-{device_type}")
+        elif target_path != self.download_dir:
             self.log_message(f"Placing in: {os.path.relpath(target_path, self.download_dir)}/")
-        elif dist_type == "Android-Extras" and device_type:
-            # Extra files use the path from ANDROID_REQUIRED_FILES
-            folder_name = f"Android-{device_type}"
-            if file_path:
-                # Use the specified path (e.g., "switchroot/android/bootlogo_android.bmp")
-                target_path = os.path.join(self.download_dir, folder_name, os.path.dirname(file_path))
-                os.makedirs(target_path, exist_ok=True)
-                filepath = os.path.join(self.download_dir, folder_name, file_path)
-            else:
-                # Fallback to switchroot/android
-                android_extras_path = os.path.join(self.download_dir, folder_name, "switchroot", "android")
-                os.makedirs(android_extras_path, exist_ok=True)
-                filepath = os.path.join(android_extras_path, filename)
-            self.log_message(f"Placing in: {os.path.relpath(os.path.dirname(filepath), self.download_dir)}/")
-        else:
-            # Default location
-            filepath = os.path.join(self.download_dir, filename)
 
         try:
-            # First, get the file size and check if server supports range requests
-            head_response = self.session.head(url, timeout=10, allow_redirects=True)
-            head_response.raise_for_status()
+            if task.expected_size > 0:
+                # Size is already known from the scan; range support is confirmed
+                # by the segments' 206 replies instead of a separate HEAD round-trip
+                total_size = task.expected_size
+                accept_ranges = 'bytes'
+            else:
+                # First, get the file size and check if server supports range requests
+                head_response = self.session.head(url, timeout=10, allow_redirects=True)
+                head_response.raise_for_status()
 
-            total_size = int(head_response.headers.get('Content-Length', 0))
-            accept_ranges = head_response.headers.get('Accept-Ranges', 'none')
+                total_size = int(head_response.headers.get('Content-Length', 0))
+                accept_ranges = head_response.headers.get('Accept-Ranges', 'none')
 
             # Use multi-connection download only if:
             # 1. Server supports range requests
@@ -1185,78 +1942,44 @@ class SwitchrootDownloader:
             if use_multiconnection:
                 self.log_message(f"Using {self.download_connections} parallel connections for {filename}")
 
-                # Calculate segment size
-                segment_size = total_size // self.download_connections
-                segments = []
-                temp_files = []
-
-                # Create segment ranges
-                for i in range(self.download_connections):
-                    start = i * segment_size
-                    # Last segment gets any remaining bytes
-                    end = start + segment_size - 1 if i < self.download_connections - 1 else total_size - 1
-                    temp_file = f"{filepath}.part{i}"
-                    segments.append((start, end, i, temp_file))
-                    temp_files.append(temp_file)
-
-                # Progress tracking for all segments
-                progress_dict = {i: 0 for i in range(self.download_connections)}
-
-                # Download all segments in parallel
-                with ThreadPoolExecutor(max_workers=self.download_connections) as executor:
-                    futures = []
-                    for start, end, segment_num, temp_file in segments:
-                        future = executor.submit(
-                            self.download_segment,
-                            url, start, end, segment_num, temp_file,
-                            progress_dict, filename
-                        )
-                        futures.append(future)
-
-                    # Monitor progress while downloading
-                    while any(not f.done() for f in futures):
-                        time.sleep(0.1)
-                        downloaded_size = sum(progress_dict.values())
-
-                        # Rate-limit GUI updates
-                        current_time = time.time()
-                        if current_time - self.last_update_time > 0.1:
-                            self.last_update_time = current_time
-                            with self.download_lock:
-                                completed = self.completed_downloads
-                            self.master.after(0, self.update_progress, filename,
-                                              completed, total_files, downloaded_size, total_size)
-
-                    # Check for any errors
-                    for future in futures:
-                        future.result()  # This will raise any exceptions that occurred
-
-                # Combine all segments into final file
-                self.log_message(f"Combining {self.download_connections} segments for {filename}...")
-                with open(filepath, 'wb') as outfile:
-                    for temp_file in temp_files:
-                        with open(temp_file, 'rb') as infile:
-                            shutil.copyfileobj(infile, outfile)
-                        os.remove(temp_file)  # Clean up temp file
-
-            else:
-                # Fall back to single-connection download
-                if not use_multiconnection and total_size > 5 * 1024 * 1024:
-                    self.log_message(f"Server doesn't support range requests, using single connection for {filename}")
-
-                response = self.session.get(url, stream=True, timeout=30, allow_redirects=True)
-                response.raise_for_status()
-
-                if total_size == 0:
-                    total_size = int(response.headers.get('Content-Length', 0))
-
-                downloaded_size = 0
-
-                with open(filepath, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=self.download_chunk_size):
-                        if chunk:
-                            f.write(chunk)
-                            downloaded_size += len(chunk)
+                try:
+                    # Calculate segment size
+                    segment_size = total_size // self.download_connections
+                    segments = []
+
+                    # Create segment ranges
+                    for i in range(self.download_connections):
+                        start = i * segment_size
+                        # Last segment gets any remaining bytes
+                        end = start + segment_size - 1 if i < self.download_connections - 1 else total_size - 1
+                        segments.append((start, end, i))
+
+                    # Preallocate the output file; segments write at their own offsets,
+                    # so there are no part files to combine afterwards
+                    with open(filepath, 'wb') as f:
+                        f.truncate(total_size)
+
+                    # Segments report the bytes they write through this queue
+                    progress_q = queue.Queue()
+                    downloaded_size = 0
+
+                    # Download all segments in parallel
+                    with ThreadPoolExecutor(max_workers=self.download_connections) as executor:
+                        futures = []
+                        for start, end, segment_num in segments:
+                            future = executor.submit(
+                                self.download_segment,
+                                url, start, end, total_size, segment_num, filepath,
+                                progress_q, filename
+                            )
+                            futures.append(future)
+
+                        # Monitor progress while downloading, waking when a segment
+                        # finishes or at most every 100 ms
+                        pending = set(futures)
+                        while pending:
+                            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                            downloaded_size += drain_queue(progress_q)
 
                             # Rate-limit GUI updates
                             current_time = time.time()
@@ -1264,8 +1987,55 @@ class SwitchrootDownloader:
                                 self.last_update_time = current_time
                                 with self.download_lock:
                                     completed = self.completed_downloads
-                                self.master.after(0, self.update_progress, filename,
-                                                  completed, total_files, downloaded_size, total_size)
+                                self.post_progress(filename, completed, total_files, downloaded_size, total_size)
+
+                        # Check for any errors
+                        for future in futures:
+                            future.result()  # This will raise any exceptions that occurred
+                except RangeNotSupported:
+                    # Server answered a segment with the whole file; start over on one connection
+                    use_multiconnection = False
+
+            if not use_multiconnection:
+                # Fall back to single-connection download
+                if total_size > 5 * 1024 * 1024:
+                    self.log_message(f"Server doesn't support range requests, using single connection for {filename}")
+
+                with self.session.get(url, stream=True, timeout=30, allow_redirects=True) as response:
+                    response.raise_for_status()
+
+                    if total_size == 0:
+                        total_size = int(response.headers.get('Content-Length', 0))
+
+                    downloaded_size = 0
+
+                    evict_cache = total_size >= PAGE_CACHE_DROP_BYTES
+                    next_evict = PAGE_CACHE_DROP_STEP
+                    with open(filepath, 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=self.read_size(total_size)):
+                            self.raise_if_closing()
+                            if chunk:
+                                f.write(chunk)
+                                downloaded_size += len(chunk)
+                                if evict_cache and downloaded_size >= next_evict:
+                                    drop_page_cache(f, 0, downloaded_size)
+                                    next_evict += PAGE_CACHE_DROP_STEP
+
+                                # Rate-limit GUI updates
+                                current_time = time.time()
+                                if current_time - self.last_update_time > 0.1:
+                                    self.last_update_time = current_time
+                                    with self.download_lock:
+                                        completed = self.completed_downloads
+                                    self.post_progress(filename, completed, total_files, downloaded_size, total_size)
+                        if evict_cache:
+                            drop_page_cache(f, 0, downloaded_size)
+
+                # The expected size came from the scan, so a different byte count
+                # means the file changed on the server since
+                if task.expected_size and downloaded_size != task.expected_size:
+                    raise SizeMismatch(f"Received {downloaded_size} bytes, expected {task.expected_size}; "
+                                       f"refresh the list and try again")
 
             # Increment completed counter after successful download
             with self.download_lock:
@@ -1280,20 +2050,12 @@ class SwitchrootDownloader:
                 os.remove(filepath) # Clean up partial file
             except OSError:
                 pass # File might not exist
-            # Clean up any temp segment files
-            for i in range(self.download_connections):
-                try:
-                    os.remove(f"{filepath}.part{i}")
-                except OSError:
-                    pass
         except Exception as e:
             self.log_message(f"FATAL ERROR on {filename}: {e}")
-            # Clean up any temp segment files
-            for i in range(self.download_connections):
-                try:
-                    os.remove(f"{filepath}.part{i}")
-                except OSError:
-                    pass
+            try:
+                os.remove(filepath) # Clean up partial (possibly preallocated) file
+            except OSError:
+                pass
 
     def update_progress(self, filename, completed_count, total_files, downloaded_size, total_size):
         """Thread-safe method to update all progress indicators"""
@@ -1334,6 +2096,9 @@ class SwitchrootDownloader:
 
     def reset_ui_after_download(self):
         """Resets the UI to 'Ready' state"""
+        # Drop any progress update still waiting for the pump so it can't overwrite 'Ready'
+        with self._pump_lock:
+            self._progress_state = None
         self.set_ui_state("normal")
         self.progress_label.config(text="Ready")
         self.total_progress_label.config(text="")
@@ -1341,13 +2106,7 @@ class SwitchrootDownloader:
         
     def format_size(self, size_bytes):
         """Converts bytes to human-readable format"""
-        if size_bytes == 0:
-            return "0 B"
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.1f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.1f} TB"
+        return format_size(int(size_bytes))
 
 
 if __name__ == "__main__":
@@ -1366,4 +2125,11 @@ if __name__ == "__main__":
             print(f"Error setting taskbar icon: {e}")
             
     app = SwitchrootDownloader(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+
+    # The window is gone and on_close has flushed the settings. Pool workers
+    # aren't daemon threads, so a request still in flight would keep a
+    # windowless process alive until it times out; exit right away instead.
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(0)
\ No newline at end of file